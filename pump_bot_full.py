@@ -3,22 +3,20 @@
 # Python 3.10+ / Replit-ready
 # Мета: моніторинг усіх USDT пар, відправка сигналів у Telegram
 
-import pandas as pd
 import requests
-import ta
 from datetime import datetime, timedelta, timezone
 import time
 import json
 import logging
 import os
+import sys
+import signal
+import threading
+from collections import Counter
 import numpy as np
 # from telethon import TelegramClient  # Відключено для стабільності
-import matplotlib
-matplotlib.use('Agg')  # Безголовий режим для серверного середовища
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import mplfinance as mpf
-from io import BytesIO
+# pandas, ta, matplotlib та mplfinance імпортуються ліниво (див. import_charting),
+# бо потрібні лише для графіка сигналу та резервного CSV
 
 # Налаштування логування
 logging.basicConfig(
@@ -39,6 +37,81 @@ CHAT_ID = "-1002463181604"
 
 MEXC_BASE_URL = "https://api.mexc.com"
 CHART_FILE = "signal_chart.png"
+MEXC_FUTURES_URL = "https://contract.mexc.com"
+CONFIG_FILE = "bot_config.json"
+
+# === Захист від деградації API ===
+REQUEST_TIMEOUT = 10              # Максимальний таймаут одного запиту (с)
+BREAKER_FAILURE_THRESHOLD = 5     # Помилок/повільних відповідей поспіль до відкриття
+BREAKER_LATENCY_THRESHOLD = 5.0   # Відповідь довша за це (с) вважається збоєм
+BREAKER_RECOVERY_TIMEOUT = 30.0   # Скільки (с) breaker відкритий до half-open проби
+BREAKER_HALF_OPEN_PROBES = 1      # Успішних проб для повного закриття
+CYCLE_DEADLINE = 600.0            # Максимальна тривалість сканування одного циклу (с)
+
+# === Профілювання ===
+PROFILE_DIR = "profiles"          # Куди пишуться flame graph та звіти
+PROFILE_INTERVAL = 0.01           # Інтервал семплування стеку (с)
+PROFILE_DEFAULT_CYCLES = 3        # Скільки циклів профілювати після SIGUSR1
+PROFILE_TOP_N = 25                # Кількість функцій у звіті
+
+def get_rss_mb():
+    """Поточна резидентна пам'ять процесу (МБ)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # Не Linux: пікове значення, на macOS в байтах
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+    except Exception:
+        return 0.0
+
+def get_process_age():
+    """Скільки секунд минуло від запуску процесу (разом з інтерпретатором та імпортами)"""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # Поле 22 - час старту процесу в тіках від завантаження системи
+            started_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        # Не Linux: CPU-час процесу як наближення
+        return time.process_time()
+
+_charting = None
+
+def import_charting():
+    """Лінивий імпорт pandas, ta, matplotlib та mplfinance (перший сигнал)"""
+    global _charting
+    if _charting is None:
+        started = time.perf_counter()
+        rss_before = get_rss_mb()
+        import pandas as pd
+        import ta
+        import matplotlib
+        matplotlib.use('Agg')  # Безголовий режим для серверного середовища
+        import matplotlib.pyplot as plt
+        import mplfinance as mpf
+        _charting = (pd, ta, plt, mpf)
+        logger.info(f"📦 Модулі графіків завантажено за {time.perf_counter() - started:.2f}с "
+                    f"(+{get_rss_mb() - rss_before:.0f} МБ RSS)")
+    return _charting
+
+def load_bot_config():
+    """Завантаження bot_config.json як словника (порожній при помилці)"""
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    except Exception as e:
+        logger.error(f"Помилка читання {CONFIG_FILE}: {e}")
+    return {}
 
 def load_cached_pairs():
     """Завантаження збережених пар з файлу"""
@@ -170,28 +243,29 @@ def get_mexc_futures_pairs():
             return get_usdt_pairs()
 
 # === Завантаження оптимальних порогів з Проекту 1 ===
-def load_analyzed_signals():
+def load_analyzed_signals(config=None):
     """Завантаження налаштувань з веб інтерфейсу (bot_config.json)"""
     try:
         # Спочатку перевіряємо конфігурацію з веб інтерфейсу
-        if os.path.exists("bot_config.json"):
-            with open("bot_config.json", 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-                RSI_THRESHOLD = config.get('rsi_threshold', 50.0)
-                PRICE_CHANGE_THRESHOLD = config.get('price_change', 5.0)
-                VOLUME_RATIO_THRESHOLD = config.get('volume_ratio', 1.5)
-                
-                logger.info(f"📋 Завантажено налаштування з веб інтерфейсу:")
-                logger.info(f"   RSI >= {RSI_THRESHOLD}")
-                logger.info(f"   Зміна ціни >= {PRICE_CHANGE_THRESHOLD}%")
-                logger.info(f"   Об'єм >= {VOLUME_RATIO_THRESHOLD}x")
-                logger.info(f"   Збережено: {config.get('saved_at', 'невідомо')}")
-                
-                return RSI_THRESHOLD, PRICE_CHANGE_THRESHOLD, VOLUME_RATIO_THRESHOLD
+        if os.path.exists(CONFIG_FILE):
+            if config is None:
+                config = load_bot_config()
+            
+            RSI_THRESHOLD = config.get('rsi_threshold', 50.0)
+            PRICE_CHANGE_THRESHOLD = config.get('price_change', 5.0)
+            VOLUME_RATIO_THRESHOLD = config.get('volume_ratio', 1.5)
+            
+            logger.info(f"📋 Завантажено налаштування з веб інтерфейсу:")
+            logger.info(f"   RSI >= {RSI_THRESHOLD}")
+            logger.info(f"   Зміна ціни >= {PRICE_CHANGE_THRESHOLD}%")
+            logger.info(f"   Об'єм >= {VOLUME_RATIO_THRESHOLD}x")
+            logger.info(f"   Збережено: {config.get('saved_at', 'невідомо')}")
+            
+            return RSI_THRESHOLD, PRICE_CHANGE_THRESHOLD, VOLUME_RATIO_THRESHOLD
         
         # Резервний варіант - читаємо з CSV файлу
         elif os.path.exists("berloga_trade_messages.csv"):
+            import pandas as pd
             df_analyzed = pd.read_csv("berloga_trade_messages.csv")
             if 'rsi' not in df_analyzed.columns:
                 df_analyzed['rsi'] = 50.0
@@ -283,6 +357,8 @@ def check_exchanges_for_pair(pair):
 def create_chart(pair, pump_data):
     """Створити графік для памп сигналу"""
     try:
+        pd, ta, plt, mpf = import_charting()
+        
         # Спочатку пробуємо отримати 5-хвилинні дані для стабільності
         df_chart = get_historical_klines(pair, "5m", 200)  # 200 5-хвилинних свічок (16+ годин)
         
@@ -390,44 +466,218 @@ def get_usdt_pairs():
         logger.error(f"Помилка завантаження спот пар: {e}")
         return []
 
+# === Circuit breakers та дедлайн циклу ===
+class CircuitOpenError(Exception):
+    """Запит відхилено, бо breaker для цього ендпоінту відкритий"""
+
+class DeadlineExceeded(Exception):
+    """Вичерпано час, відведений на поточний цикл сканування"""
+
+class CircuitBreaker:
+    """Breaker для одного хоста/ендпоінту: closed -> open -> half_open -> closed"""
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 latency_threshold=BREAKER_LATENCY_THRESHOLD,
+                 recovery_timeout=BREAKER_RECOVERY_TIMEOUT,
+                 half_open_probes=BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.probe_successes = 0
+        self.probe_in_flight = False
+        self.opened_at = 0.0
+        self.open_count = 0
+        self.rejected = 0
+        self.failures = 0
+        self.slow_calls = 0
+
+    def is_open(self):
+        """Чи відкритий breaker і ще не настав час half-open проби"""
+        return self.state == "open" and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def allow_request(self):
+        """Чи можна зараз звертатися до ендпоінту"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self.probe_successes = 0
+            self.probe_in_flight = False
+            logger.info(f"🟡 Breaker {self.name}: half-open, пробний запит")
+        if self.state == "half_open":
+            # Пропускаємо лише одну пробу за раз, решту відхиляємо
+            if self.probe_in_flight:
+                self.rejected += 1
+                return False
+            self.probe_in_flight = True
+        return True
+
+    def record_success(self, elapsed):
+        """Зафіксувати відповідь (повільна відповідь рахується як збій)"""
+        if elapsed > self.latency_threshold:
+            self.slow_calls += 1
+            self.record_failure()
+            return
+        self.consecutive_failures = 0
+        if self.state == "half_open":
+            self.probe_in_flight = False
+            self.probe_successes += 1
+            if self.probe_successes >= self.half_open_probes:
+                self.state = "closed"
+                logger.info(f"🟢 Breaker {self.name}: закрито, ендпоінт відновився")
+
+    def record_failure(self):
+        """Зафіксувати збій і відкрити breaker при перевищенні порогу"""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.open_count += 1
+                logger.warning(f"🔴 Breaker {self.name}: відкрито після {self.consecutive_failures} збоїв "
+                               f"на {self.recovery_timeout:.0f}с")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        """Стан breaker для метрик"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failures': self.failures,
+            'slow_calls': self.slow_calls,
+            'rejected': self.rejected,
+            'open_count': self.open_count
+        }
+
+_breakers = {}
+_cycle_deadline = None
+
+def get_breaker(host, endpoint):
+    """Breaker для пари хост + ендпоінт (створюється при першому зверненні)"""
+    name = f"{host}{endpoint}"
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+def start_cycle_deadline(seconds=CYCLE_DEADLINE):
+    """Встановити дедлайн для поточного циклу сканування"""
+    global _cycle_deadline
+    # Значення приходить з bot_config.json (веб інтерфейс), тож може бути рядком
+    try:
+        seconds = float(seconds)
+        if not seconds > 0:
+            raise ValueError(seconds)
+    except (TypeError, ValueError):
+        logger.warning(f"⚠️ Некоректний cycle_deadline={seconds!r}, використовуємо {CYCLE_DEADLINE:.0f}с")
+        seconds = CYCLE_DEADLINE
+    _cycle_deadline = time.monotonic() + seconds
+
+def cycle_time_left():
+    """Скільки секунд залишилось до дедлайну циклу (None - без обмеження)"""
+    if _cycle_deadline is None:
+        return None
+    return _cycle_deadline - time.monotonic()
+
+def guarded_get(host, endpoint, url, params=None, timeout=REQUEST_TIMEOUT):
+    """GET-запит через circuit breaker з урахуванням дедлайну циклу"""
+    time_left = cycle_time_left()
+    if time_left is not None:
+        if time_left <= 0:
+            raise DeadlineExceeded("дедлайн циклу вичерпано")
+        timeout = min(timeout, time_left)
+
+    breaker = get_breaker(host, endpoint)
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"breaker {breaker.name} відкритий")
+
+    started = time.monotonic()
+    try:
+        r = requests.get(url, params=params, timeout=timeout)
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    elapsed = time.monotonic() - started
+
+    # 4xx (наприклад, невідома спот пара) - це відповідь здорового сервера
+    if r.status_code >= 500 or r.status_code == 429:
+        breaker.record_failure()
+    else:
+        breaker.record_success(elapsed)
+    return r
+
+def all_breakers_open():
+    """Чи відкриті всі відомі breaker-и (скан не має сенсу продовжувати)"""
+    return bool(_breakers) and all(b.is_open() for b in _breakers.values())
+
+def get_breaker_metrics():
+    """Метрики всіх breaker-ів: {назва: стан}"""
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+def format_breaker_metrics():
+    """Короткий рядок зі станом breaker-ів для логу"""
+    if not _breakers:
+        return "немає запитів"
+    return ", ".join(
+        f"{name}={m['state']} (збоїв={m['failures']}, повільних={m['slow_calls']}, "
+        f"відхилено={m['rejected']}, відкрито={m['open_count']})"
+        for name, m in get_breaker_metrics().items()
+    )
+
+KLINE_FIELDS = ("time_open", "open", "high", "low", "close", "volume")
+
+def parse_kline_rows(rows):
+    """Рядки klines [time, open, high, low, close, volume, ...] -> словник NumPy масивів"""
+    if not isinstance(rows, list) or len(rows) == 0:
+        return None
+    # MEXC API повертає різну кількість колонок залежно від пари,
+    # ціни приходять рядками - беремо лише базові 6 колонок
+    values = np.array([row[:6] for row in rows], dtype=np.float64)
+    klines = {field: values[:, i] for i, field in enumerate(KLINE_FIELDS)}
+    klines["time_open"] = klines["time_open"].astype(np.int64)
+    return klines
+
+def klines_to_dataframe(klines):
+    """Словник NumPy масивів -> DataFrame (лише для графіків)"""
+    pd = import_charting()[0]
+    if klines is None:
+        return pd.DataFrame()
+    df = pd.DataFrame({field: klines[field] for field in KLINE_FIELDS})
+    df["time_open"] = pd.to_datetime(df["time_open"], unit='ms', utc=True)
+    return df
+
 def get_historical_klines(symbol, interval, limit):
-    """Отримання історичних даних (спочатку спот, потім ф'ючерсні)"""
+    """Отримання історичних даних як DataFrame (для графіків)"""
+    return klines_to_dataframe(get_historical_kline_arrays(symbol, interval, limit))
+
+def get_historical_kline_arrays(symbol, interval, limit):
+    """Отримання історичних даних як NumPy масивів (спочатку спот, потім ф'ючерсні)"""
     # Спочатку пробуємо спот API
-    df = get_spot_klines(symbol, interval, limit)
+    klines = get_spot_klines(symbol, interval, limit)
     
     # Якщо спот не працює, пробуємо ф'ючерсний API
-    if df.empty:
-        df = get_futures_klines(symbol, interval, limit)
+    if klines is None:
+        klines = get_futures_klines(symbol, interval, limit)
     
-    return df
+    return klines
 
 def get_spot_klines(symbol, interval, limit):
     """Отримання спот даних"""
     try:
         url = f"{MEXC_BASE_URL}/api/v3/klines"
         params = {"symbol": symbol, "interval": interval, "limit": limit}
-        r = requests.get(url, params=params, timeout=10)
+        r = guarded_get("api.mexc.com", "/api/v3/klines", url, params=params)
         r.raise_for_status()
-        data = r.json()
-        
-        if not isinstance(data, list) or len(data) == 0:
-            return pd.DataFrame()
-            
-        # MEXC API повертає різну кількість колонок залежно від пари
-        # Базові колонки: timestamp, open, high, low, close, volume
-        num_cols = len(data[0]) if len(data) > 0 else 12
-        base_cols = ["time_open", "open", "high", "low", "close", "volume"]
-        extra_cols = [f"_extra_{i}" for i in range(6, num_cols)]
-        all_cols = base_cols + extra_cols
-        
-        df = pd.DataFrame(data, columns=all_cols)
-        df["time_open"] = pd.to_datetime(df["time_open"], unit='ms', utc=True)
-        df = df.astype({"open": float, "high": float, "low": float, "close": float, "volume": float})
-        return df[["time_open", "open", "high", "low", "close", "volume"]]
+        return parse_kline_rows(r.json())
         
     except Exception as e:
         # Не логуємо как warning - це нормально для деяких пар
-        return pd.DataFrame()
+        return None
 
 def get_futures_klines(symbol, interval, limit):
     """Отримання ф'ючерсних даних з MEXC"""
@@ -439,51 +689,69 @@ def get_futures_klines(symbol, interval, limit):
         # Конвертуємо символ: BTCUSDT -> BTC_USDT
         futures_symbol = symbol.replace('USDT', '_USDT') if '_' not in symbol else symbol
         
-        url = f"https://contract.mexc.com/api/v1/contract/kline/{futures_symbol}"
+        url = f"{MEXC_FUTURES_URL}/api/v1/contract/kline/{futures_symbol}"
         params = {"interval": mexc_interval, "limit": limit}
         
-        r = requests.get(url, params=params, timeout=10)
+        r = guarded_get("contract.mexc.com", "/api/v1/contract/kline", url, params=params)
         r.raise_for_status()
         data = r.json()
         
-        if not data.get("data") or not isinstance(data["data"], list):
-            return pd.DataFrame()
-        
-        klines = data["data"]
-        
-        # Конвертуємо в DataFrame
-        df = pd.DataFrame(klines, columns=['time_open', 'open', 'high', 'low', 'close', 'volume'])
-        df["time_open"] = pd.to_datetime(df["time_open"], unit='ms', utc=True)
-        df = df.astype({"open": float, "high": float, "low": float, "close": float, "volume": float})
-        
-        return df
+        return parse_kline_rows(data.get("data"))
         
+    except (CircuitOpenError, DeadlineExceeded):
+        # Стан breaker-ів логуються раз за цикл, а не для кожної пари
+        return None
     except Exception as e:
         logger.warning(f"Помилка завантаження ф'ючерсних даних для {symbol}: {e}")
-        return pd.DataFrame()
+        return None
+
+def compute_rsi(close, window=14):
+    """RSI на NumPy, ідентичний ta.momentum.RSIIndicator(close, window).rsi()"""
+    close = np.asarray(close, dtype=np.float64)
+    rsi = np.full(close.shape, np.nan)
+    if len(close) == 0:
+        return rsi
+    diff = np.diff(close, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+
+    # EWM з alpha=1/window, adjust=False, min_periods=window (як у ta)
+    alpha = 1.0 / window
+    ema_up, ema_down = up[0], down[0]
+    for i in range(len(close)):
+        if i > 0:
+            ema_up = (1 - alpha) * ema_up + alpha * up[i]
+            ema_down = (1 - alpha) * ema_down + alpha * down[i]
+        if i + 1 >= window:
+            if ema_down == 0:
+                rsi[i] = 100.0
+            else:
+                rsi[i] = 100.0 - 100.0 / (1.0 + ema_up / ema_down)
+    return rsi
 
 def analyze_pair(pair, rsi_threshold, price_change_threshold, volume_ratio_threshold):
     """Аналіз пари на памп сигнал"""
     try:
         # Невелика затримка для запобігання rate limiting
         time.sleep(0.1)
-        df = get_historical_klines(pair, "1m", 50)
-        if df.empty or len(df) < 14:  # Мінімум для RSI
+        klines = get_historical_kline_arrays(pair, "1m", 50)
+        if klines is None or len(klines['close']) < 14:  # Мінімум для RSI
             return None
 
+        close = klines['close']
+        volume = klines['volume']
+
         # Розрахунок RSI
-        rsi_indicator = ta.momentum.RSIIndicator(df['close'], window=14)
-        rsi_series = rsi_indicator.rsi()
-        rsi = rsi_series.iloc[-1]
+        rsi = compute_rsi(close, window=14)[-1]
         
         # Розрахунок зміни ціни
-        close_last = df['close'].iloc[-1]
-        close_first = df['close'].iloc[0]
+        close_last = float(close[-1])
+        close_first = float(close[0])
         price_change = ((close_last - close_first) / close_first) * 100
         
         # Розрахунок коефіцієнту об'єму
-        volume_last = df['volume'].iloc[-1]
-        volume_mean = df['volume'].mean()
+        volume_last = volume[-1]
+        volume_mean = volume.mean()
         vol_ratio = volume_last / volume_mean if volume_mean > 0 else 0
 
         # Логування для дебагу (кожна 100-та пара)
@@ -530,9 +798,156 @@ def format_pump_message(pump_data):
 ⏰ {pump_data['timestamp'].strftime('%H:%M:%S UTC')}
 🤖 Автоматический мониторинг MEXC"""
 
+# === Семплюючий профайлер ===
+class SamplingProfiler:
+    """Фоновий потік, що періодично знімає стек основного потоку"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._target_id = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """Чи працює зараз потік семплування"""
+        return self._thread is not None
+
+    def start(self):
+        """Почати семплування потоку, який викликав start()"""
+        self.stacks = Counter()
+        self.samples = 0
+        self._target_id = threading.get_ident()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Зупинити семплування"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            if frame is None:
+                continue
+            # Для верхнього кадру додаємо рядок: C-виклики (time.sleep, json, np.array)
+            # не мають власного кадру, і лише рядок відрізняє паузу від роботи
+            leaf = frame
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+                if frame is leaf:
+                    name = f"{name}:{frame.f_lineno}"
+                stack.append(name)
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        """Записати стеки у collapsed-форматі (flamegraph.pl / speedscope)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def write_top_report(self, path, top_n=PROFILE_TOP_N):
+        """Записати топ рядків за власним (self) та функцій за сумарним (total) часом"""
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            funcs = stack.split(";")
+            self_counts[funcs[-1]] += count
+            # Для total рядок верхнього кадру не потрібен: file:func:line -> file:func
+            funcs[-1] = funcs[-1].rsplit(":", 1)[0]
+            for func in set(funcs):
+                total_counts[func] += count
+
+        total = self.samples or 1
+        lines = [f"Семплів: {self.samples}, інтервал: {self.interval * 1000:.0f}мс", ""]
+        for title, counts in (("Self (рядок на вершині стеку)", self_counts),
+                              ("Total (функція будь-де в стеку)", total_counts)):
+            lines.append(f"=== {title} ===")
+            for func, count in counts.most_common(top_n):
+                lines.append(f"{count:8d} {count / total * 100:6.1f}%  {func}")
+            lines.append("")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+
+_profiler = None
+_profile_cycles_left = 0
+_profile_signal_requested = False
+_profile_config_seen = None
+
+def request_profiling(signum=None, frame=None):
+    """Обробник SIGUSR1: увімкнути профілювання з наступного циклу"""
+    global _profile_signal_requested
+    _profile_signal_requested = True
+
+def install_profiling_signal():
+    """Зареєструвати SIGUSR1 для увімкнення профілювання (якщо ОС підтримує)"""
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, request_profiling)
+
+def profile_cycle_start(cycle_count, config=None):
+    """Почати профілювання циклу, якщо його запитали сигналом або в конфігу"""
+    global _profiler, _profile_cycles_left, _profile_signal_requested, _profile_config_seen
+
+    if config is None:
+        config = load_bot_config()
+    # Прапорець у bot_config.json спрацьовує один раз на кожне нове значення
+    raw_cycles = config.get('profile_cycles', 0)
+    try:
+        config_cycles = int(raw_cycles or 0)
+    except (TypeError, ValueError):
+        # Не запам'ятовуємо некоректне значення - після виправлення воно спрацює
+        logger.warning(f"⚠️ Некоректний profile_cycles={raw_cycles!r}, профілювання з конфігу пропущено")
+        config_cycles = _profile_config_seen
+    if config_cycles != _profile_config_seen:
+        _profile_config_seen = config_cycles
+        if config_cycles > 0:
+            _profile_cycles_left = config_cycles
+            logger.info(f"🔬 Профілювання увімкнено з конфігу на {_profile_cycles_left} циклів")
+    if _profile_signal_requested:
+        _profile_signal_requested = False
+        _profile_cycles_left = PROFILE_DEFAULT_CYCLES
+        logger.info(f"🔬 Профілювання увімкнено сигналом на {_profile_cycles_left} циклів")
+
+    if _profile_cycles_left <= 0 or (_profiler is not None and _profiler.is_running):
+        return
+    if _profiler is None:
+        _profiler = SamplingProfiler()
+    _profiler.start()
+
+def profile_cycle_end(cycle_count):
+    """Зупинити профілювання циклу та записати flame graph і звіт"""
+    global _profile_cycles_left
+    if _profiler is None or not _profiler.is_running:
+        return
+    _profiler.stop()
+    _profile_cycles_left -= 1
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+        base = os.path.join(PROFILE_DIR, f"cycle{cycle_count}_{stamp}")
+        _profiler.write_collapsed(f"{base}.collapsed")
+        _profiler.write_top_report(f"{base}_top.txt")
+        logger.info(f"🔬 Профіль циклу #{cycle_count}: {_profiler.samples} семплів -> {base}.collapsed "
+                    f"(залишилось циклів: {_profile_cycles_left})")
+    except Exception as e:
+        logger.error(f"Помилка запису профілю: {e}")
+
 # === Основний цикл ===
 def main():
     """Основна функція бота"""
+    # Першим ділом: без обробника SIGUSR1 під час старту завершив би процес
+    install_profiling_signal()
     logger.info("🚀 Запуск Супер Памп Бота (повна версія)")
     
     # Тестова відправка при запуску відключена за вимогою користувача
@@ -562,15 +977,19 @@ def main():
     # send_telegram_message(start_msg)
     
     cycle_count = 0
+    scan_offset = 0  # З якої пари почати цикл (продовжуємо там, де зупинив дедлайн)
     
     while True:
         try:
             cycle_count += 1
+            # bot_config.json читається один раз за цикл
+            config = load_bot_config()
+            profile_cycle_start(cycle_count, config)
             start_time = datetime.now(timezone.utc)
             logger.info(f"🔄 Цикл #{cycle_count} - початок сканування о {start_time.strftime('%H:%M:%S UTC')}")
             
             # Перечитуємо налаштування з веб інтерфейсу перед кожним циклом
-            current_rsi, current_price, current_volume = load_analyzed_signals()
+            current_rsi, current_price, current_volume = load_analyzed_signals(config)
             
             # Перевіряємо чи змінились налаштування
             if (current_rsi != RSI_THRESHOLD or current_price != PRICE_CHANGE_THRESHOLD or 
@@ -583,8 +1002,28 @@ def main():
                 RSI_THRESHOLD, PRICE_CHANGE_THRESHOLD, VOLUME_RATIO_THRESHOLD = current_rsi, current_price, current_volume
             
             pump_signals = []
+            skipped_pairs = 0
             
-            for i, pair in enumerate(pairs):
+            # Дедлайн циклу: деградоване API коштує секунди, а не години
+            start_cycle_deadline(config.get('cycle_deadline', CYCLE_DEADLINE))
+            
+            if scan_offset:
+                logger.info(f"↪️ Продовжуємо з пари #{scan_offset + 1} ({pairs[scan_offset]})")
+            scan_order = pairs[scan_offset:] + pairs[:scan_offset]
+            
+            for i, pair in enumerate(scan_order):
+                time_left = cycle_time_left()
+                deadline_hit = time_left is not None and time_left <= 0
+                if deadline_hit or all_breakers_open():
+                    skipped_pairs = len(scan_order) - i
+                    reason = ("Дедлайн циклу вичерпано" if deadline_hit
+                              else "API MEXC недоступне (всі breaker-и відкриті)")
+                    logger.warning(f"⏱️ {reason}, пропущено {skipped_pairs} пар: "
+                                   f"{pair} … {scan_order[-1]}")
+                    # Наступний цикл почнеться з першої пропущеної пари
+                    scan_offset = (scan_offset + i) % len(pairs)
+                    break
+                
                 try:
                     pump_data = analyze_pair(pair, RSI_THRESHOLD, PRICE_CHANGE_THRESHOLD, VOLUME_RATIO_THRESHOLD)
                     
@@ -633,6 +1072,11 @@ def main():
             duration = (end_time - start_time).total_seconds()
             
             logger.info(f"✅ Цикл #{cycle_count} завершено за {duration:.1f}с. Знайдено {len(pump_signals)} сигналів")
+            logger.info(f"⚡ Circuit breakers: {format_breaker_metrics()}")
+            logger.info(f"🧠 RSS: {get_rss_mb():.0f} МБ")
+            if skipped_pairs:
+                logger.info(f"⏭️ Пропущено {skipped_pairs}/{len(pairs)} пар у циклі #{cycle_count}")
+            profile_cycle_end(cycle_count)
             
             # Підсумкові повідомлення вимкнено для зменшення спаму
             # if cycle_count % 10 == 0:
@@ -650,6 +1094,7 @@ def main():
             
         except Exception as e:
             logger.error(f"💥 Критична помилка в циклі #{cycle_count}: {e}")
+            profile_cycle_end(cycle_count)
             # error_msg вимкнено для зменшення спаму
             # send_telegram_message(error_msg)
             time.sleep(60)  # Пауза при помилці
@@ -692,7 +1137,9 @@ if __name__ == "__main__":
             logger.error("❌ Не налаштовані BOT_TOKEN або CHAT_ID")
             logger.info("💡 Додайте їх в Secrets панелі Replit")
             exit(1)
-            
+        
+        # Лише один раз: auto_restart_bot() може викликати main() повторно
+        logger.info(f"⏱️ Старт за {get_process_age():.2f}с, RSS {get_rss_mb():.0f} МБ")
         auto_restart_bot()
         
     except Exception as e: